@@ -19,7 +19,7 @@ from gi.repository import GLib
 
 from dlms_listener import DLMSListener
 
-logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
 # our own packages
 AppDir = os.path.dirname(os.path.realpath(__file__))
 sys.path.insert(1, os.path.join(AppDir, "ext", "velib_python"))
@@ -28,7 +28,7 @@ from vedbus import VeDbusService
 try:
     import config
 except ImportError as exc:
-    logging.critical("config.py not found, create it in the same directory as this script.")
+    logger.critical("config.py not found, create it in the same directory as this script.")
     raise FileNotFoundError("config.py not found") from exc
 
 
@@ -43,10 +43,12 @@ class DbusDlmsMeterService:
         productid=0,
     ):
         self._dbusservice = VeDbusService(servicename, register=False)
-        self._paths = paths
+        # Interned path keys are the same objects DLMSListener's TOPIC_TABLE writes with,
+        # so the service's path lookups on every update resolve on identity.
+        self._paths = {sys.intern(path): settings for path, settings in paths.items()}
         self._loop = None  # will be set by the listener
 
-        logging.debug("%s /DeviceInstance = %d" % (servicename, deviceinstance))
+        logger.debug("%s /DeviceInstance = %d", servicename, deviceinstance)
 
         # Create the mandatory objects
         self._dbusservice.add_mandatory_paths(
@@ -62,7 +64,7 @@ class DbusDlmsMeterService:
         )
         self._dbusservice.add_path("/CustomName", "Generic DLMS Grid Meter")
         self._dbusservice.add_path("/Role", "grid")
-        self._dbusservice.add_path("/Serial", "DLMS0000000." + config.TTY_INTERFACE)
+        self._dbusservice.add_path(sys.intern("/Serial"), "DLMS0000000." + config.TTY_INTERFACE)
 
         for path, settings in self._paths.items():
             self._dbusservice.add_path(
@@ -72,33 +74,25 @@ class DbusDlmsMeterService:
         self._dbusservice.register()
 
         # Gurux DLMS Meter Service
-        logging.info("DbusDlmsMeterService initialized with service name: %s" % servicename)
+        logger.info("DbusDlmsMeterService initialized with service name: %s", servicename)
         self._listener = DLMSListener(self)
 
-    def _update(self):
-        with self._dbusservice as s:
-            for path, settings in self._paths.items():
-                if "update" in settings:
-                    update = settings["update"]
-                    if callable(update):
-                        s[path] = update(path, s[path])
-                    else:
-                        s[path] += update
-                    logging.debug("%s: %s" % (path, s[path]))
-        return True
-
     def _handlechangedvalue(self, path, value):
-        logging.debug("someone else updated %s to %s" % (path, value))
+        logger.debug("someone else updated %s to %s", path, value)
+        self._listener.forget_sent(path)
         return True  # accept the change
 
     def exit_listener(self):
-        logging.info("Exiting listener")
+        logger.info("Exiting listener")
         self._listener.settings.media.close()
         self._listener.settings.media.removeListener(self._listener)
 
 
 def main():
-    logging.basicConfig(level=logging.DEBUG)
+    logging.basicConfig(
+        level=logging.WARNING,
+        format="%(asctime)s [%(levelname)s] %(message)s",
+    )
 
     from dbus.mainloop.glib import DBusGMainLoop
 
@@ -144,18 +138,18 @@ def main():
         },
     )
 
-    logging.info("Connected to dbus, and switching over to GLib.MainLoop() (= event based)")
+    logger.info("Connected to dbus, and switching over to GLib.MainLoop() (= event based)")
     mainloop = GLib.MainLoop()
     dlms._loop = mainloop  # pass the mainloop to the listener
-    logging.info("starting GLib.MainLoop")
+    logger.info("starting GLib.MainLoop")
     mainloop.run()
-    logging.info("GLib.MainLoop was shut down")
-    logging.info("exiting listener")
+    logger.info("GLib.MainLoop was shut down")
+    logger.info("exiting listener")
     try:
         dlms.exit_listener()
     except Exception as e:
-        logging.error("Error while exiting listener: %s", e)
-        logging.exception(e)
+        logger.error("Error while exiting listener: %s", e)
+        logger.exception(e)
 
     sys.exit(0xFF)  # reaches this only on error
 
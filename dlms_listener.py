@@ -1,12 +1,8 @@
 import logging
 import os
-import subprocess
-import time
-import traceback
+import sys
 
-from gurux_common.GXCommon import GXCommon
 from gurux_common.IGXMediaListener import IGXMediaListener
-from gurux_common.enums import MediaState
 from gurux_common.enums.TraceLevel import TraceLevel
 from gurux_common.io import Parity, StopBits, BaudRate
 from gurux_dlms.GXByteBuffer import GXByteBuffer
@@ -16,22 +12,12 @@ from gurux_dlms.enums import TranslatorOutputType  # noqa: E402
 from gurux_dlms.enums.InterfaceType import InterfaceType
 from gurux_dlms.secure import GXDLMSSecureClient
 from gurux_serial.GXSerial import GXSerial
+from gi.repository import GLib
 
 import config
 from telegram_processor import TelegramProcessor
 
-logging.basicConfig(
-    level=logging.WARNING,  # Reduce from DEBUG/INFO to WARNING
-    format="%(asctime)s [%(levelname)s] %(message)s",
-)
-
-
-def debug_log(message, *args):
-    if logging.getLogger().isEnabledFor(logging.DEBUG):
-        if args:
-            logging.debug(message % args)
-        else:
-            logging.debug(message)
+logger = logging.getLogger(__name__)
 
 
 # Pre-allocate dictionary with size hints
@@ -111,6 +97,14 @@ transform_multiply = {
     "/Ac/L3/Energy/Reverse": 0.001,
 }
 
+# Telegram key -> (D-Bus path, multiplier), so send_to_dbus needs one lookup per key.
+# Unscaled paths use the integer 1, which keeps ints as ints and /Serial a string.
+TOPIC_TABLE = {
+    sys.intern(key): (sys.intern(path), transform_multiply.get(path, 1))
+    for key, path in topic_dictionary.items()
+}
+del topic_dictionary, transform_multiply
+
 
 class GXSettings:
     def __init__(self):
@@ -121,7 +115,7 @@ class GXSettings:
             )
         if isinstance(config.BLOCK_CIPHER_KEY, str) and config.BLOCK_CIPHER_KEY:
             self.client.ciphering.blockCipherKey = GXByteBuffer.hexToBytes(config.BLOCK_CIPHER_KEY)
-        self.media = GXSerial(
+        self.media = GXSerialCustom(
             "/dev/%s" % config.TTY_INTERFACE,
             baudRate=config.SERIAL_BAUD_RATE,
             dataBits=config.BYTE_SIZE,
@@ -131,11 +125,34 @@ class GXSettings:
         self.trace = TraceLevel.INFO
 
 
+# Backoff (seconds) before watching the port again while serial-starter still holds it
+BLOCKED_RETRY_MIN = 0.1
+BLOCKED_RETRY_MAX = 5.0
+
+# Initial reply buffer size. GXByteBuffer.set() appends but only grows by the missing
+# bytes plus 10, so a fragmented telegram would reallocate on nearly every read.
+REPLY_CAPACITY = 1024
+
+# Window in which D-Bus updates of consecutive telegrams are merged into one signal
+DBUS_FLUSH_INTERVAL_MS = 50
+
+# Float readings closer than this to the last published value are not re-sent
+DBUS_FLOAT_TOLERANCE = 1e-6
+
+
 class GXSerialCustom(GXSerial):
     """
-    Manage BlockingIOError exceptions in a custom way.
+    Serial media driven by the GLib main loop instead of a Gurux reader thread.
+
+    GXSerial opens and configures the port as usual, but its file descriptor is watched
+    with GLib.unix_fd_add_full, so received data reaches the listeners on the main loop
+    thread. BlockingIOError (serial-starter still holding the port) is managed in a
+    custom way.
     """
 
+    # Largest chunk taken from the tty per wakeup; a push telegram fits in one read.
+    READ_SIZE = 4096
+
     def __init__(
         self,
         port,
@@ -144,58 +161,144 @@ class GXSerialCustom(GXSerial):
         parity=Parity.NONE,
         stopBits=StopBits.ONE,
     ):
-        super().__init__(port, baudRate, dataBits, stopBits, parity)
+        super().__init__(
+            port, baudRate=baudRate, dataBits=dataBits, parity=parity, stopBits=stopBits
+        )
+        self.__watch_id = None
+        self.__retry_id = None
         self.__blocked_count = 0
-        self.__bytesSent = 0  # pylint: disable=unused-private-member
+        self.__backoff = BLOCKED_RETRY_MIN
+        self.__stop_tty_pid = None
+        self.__restart_pid = None
 
-    def __readThread(self):  # pylint: disable=unused-private-member
-        # pylint: disable=broad-except, bare-except
-        while not self.__closing.isSet():
-            try:
-                data = self.__h.read()
-                if data is not None:
-                    self.__handleReceivedData(data, self.__portName)
-                    # Give some time before read next bytes.  In this way we are
-                    # not reading data one byte at the time.
-                    time.sleep(0.01)
-            except BlockingIOError:
-                # Execute command that disabled serial-starter for our port.
-                self.__blocked_count += 1
-                try:
-                    subprocess.run(
-                        [
-                            "/bin/bash",
-                            "/opt/victronenergy/serial-starter/stop-tty.sh",
-                            config.TTY_INTERFACE,
-                        ],
-                        check=True,
-                    )
-                except subprocess.CalledProcessError as e:
-                    logging.error(
-                        "Failed to stop serial-starter for %s: %s",
-                        config.TTY_INTERFACE,
-                        e,
-                    )
-                if self.__blocked_count > 10:
-                    script = os.path.join(os.getcwd(), "bin", "restart.sh")
-                    if os.path.exists(script):
-                        # Fire the script (don't wait for it to finish) to restart this driver.
-                        subprocess.Popen(  # pylint: disable=consider-using-with
-                            ["/bin/bash", str(script)],
-                            start_new_session=True,
-                            cwd=os.path.dirname(os.getcwd()),
-                        )
-            except Exception as ex:
-                # If serial port is removed.
-                if not self.isOpen():
-                    self.__closing.set()
-                    self.__notifyMediaStateChange(MediaState.CLOSED)
-                    self.__bytesSent = 0  # pylint: disable=unused-private-member
-                    self.__syncBase.exception = ex
-                    self.__syncBase.resetReceivedSize()
-                    self.__syncBase.setReceived()
-                if not self.__closing.isSet():
-                    traceback.print_exc()
+    def _GXSerial__readThread(self):
+        """
+        Replaces the reader thread that GXSerial.open() starts; it returns at once.
+
+        The port is read by the GLib fd watch added in open() instead.
+        """
+
+    def open(self):
+        super().open()
+        self.__backoff = BLOCKED_RETRY_MIN
+        self.__watch()
+
+    def close(self):
+        if self.__watch_id is not None:
+            GLib.source_remove(self.__watch_id)
+            self.__watch_id = None
+        if self.__retry_id is not None:
+            GLib.source_remove(self.__retry_id)
+            self.__retry_id = None
+        super().close()
+
+    def __watch(self):
+        fd = self._GXSerial__h.fileno()  # pylint: disable=no-member
+        self.__watch_id = GLib.unix_fd_add_full(
+            GLib.PRIORITY_DEFAULT,
+            fd,
+            GLib.IOCondition.IN | GLib.IOCondition.HUP | GLib.IOCondition.ERR,
+            self.__on_fd_ready,
+        )
+
+    def __on_fd_ready(self, fd, condition):
+        if condition & (GLib.IOCondition.HUP | GLib.IOCondition.ERR):
+            # Serial port is removed.
+            self.__port_lost("hung up")
+            return False
+        try:
+            data = os.read(fd, self.READ_SIZE)
+        except BlockingIOError:
+            self.__on_blocked()
+            return False
+        except OSError as ex:
+            self.__port_lost(ex)
+            return False
+        if not data:
+            self.__port_lost("end of file")
+            return False
+        self.__backoff = BLOCKED_RETRY_MIN
+        # Regular Gurux receive path: byte counters, trace and onReceived.
+        self._GXSerial__handleReceivedData(data, self.port)  # pylint: disable=no-member
+        return True
+
+    def __port_lost(self, reason):
+        logger.error("Serial port %s lost: %s", self.port, reason)
+        self.__watch_id = None
+        self.close()
+
+    def __on_blocked(self):
+        """
+        Stop watching the port and look again after an exponential backoff.
+
+        The watch is level-triggered, so keeping it while the port stays blocked would
+        wake the main loop continuously.
+        """
+        self.__watch_id = None
+        self.__blocked_count += 1
+        self.__stop_serial_starter()
+        if self.__blocked_count > 10:
+            self.__restart_driver()
+        self.__retry_id = GLib.timeout_add(int(self.__backoff * 1000), self.__on_retry)
+        self.__backoff = min(self.__backoff * 2, BLOCKED_RETRY_MAX)
+
+    def __on_retry(self):
+        self.__retry_id = None
+        self.__watch()
+        return False
+
+    def __stop_serial_starter(self):
+        """
+        Execute command that disables serial-starter for our port.
+
+        The helper is posix_spawn()ed (no fork of this process's address space) and not
+        waited for, so the main loop is never blocked by it; a GLib child watch reaps it
+        as soon as it exits and checks its exit status.
+        """
+        if self.__stop_tty_pid is not None:
+            return  # Previous attempt is still running
+        self.__stop_tty_pid = os.posix_spawn(
+            "/bin/bash",
+            [
+                "/bin/bash",
+                "/opt/victronenergy/serial-starter/stop-tty.sh",
+                config.TTY_INTERFACE,
+            ],
+            os.environ,
+        )
+        GLib.child_watch_add(GLib.PRIORITY_DEFAULT, self.__stop_tty_pid, self.__on_stop_tty_exit)
+
+    def __on_stop_tty_exit(self, _pid, status):
+        self.__stop_tty_pid = None
+        exit_code = os.waitstatus_to_exitcode(status)
+        if exit_code != 0:
+            logger.error(
+                "Failed to stop serial-starter for %s: exit status %s",
+                config.TTY_INTERFACE,
+                exit_code,
+            )
+
+    def __restart_driver(self):
+        """
+        Fire bin/restart.sh (don't wait for it to finish) to restart this driver.
+
+        It is started at most once; the child watch only reaps it and reports a failure.
+        """
+        if self.__restart_pid is not None:
+            return
+        script = os.path.join(os.getcwd(), "bin", "restart.sh")
+        if not os.path.exists(script):
+            return
+        self.__restart_pid = os.posix_spawn(
+            "/bin/bash", ["/bin/bash", script], os.environ, setsid=True
+        )
+        GLib.child_watch_add(GLib.PRIORITY_DEFAULT, self.__restart_pid, self.__on_restart_exit)
+
+    @staticmethod
+    def __on_restart_exit(_pid, status):
+        exit_code = os.waitstatus_to_exitcode(status)
+        if exit_code != 0:
+            logger.error("Failed to restart the driver: exit status %s", exit_code)
 
 
 # pylint: disable=no-self-argument
@@ -205,22 +308,27 @@ class DLMSListener(IGXMediaListener):
         self.service_obj = service_obj
         self.dbusservice = service_obj._dbusservice
         self.trace_level = self.settings.trace
+        # Log levels are configured in main() before the listener exists and never
+        # change at runtime, so decide once whether telegrams are rendered as XML.
+        self._log_xml = self.trace_level >= TraceLevel.INFO and logger.isEnabledFor(logging.DEBUG)
 
         # There might be several notify messages in GBT.
         self.notify = GXReplyData()
+        # Scratch reply for client.getData(); Gurux moves notification content into
+        # self.notify, so one instance can be cleared and reused for every read.
+        self._scratch_reply = GXReplyData()
         self.client = self.settings.client
-        self.translator = GXDLMSTranslator(type_=TranslatorOutputType.SIMPLE_XML)
-        self.translator.comments = False
-        if self.settings.client.ciphering.authenticationKey:
-            self.translator.authenticationKey = self.settings.client.ciphering.authenticationKey
-        if self.settings.client.ciphering.blockCipherKey:
-            self.translator.blockCipherKey = self.settings.client.ciphering.blockCipherKey
+        self._translator = None
+        self._pending = {}
+        self._flush_scheduled = False
+        self._last_sent = {}
         self.telegram_processor = TelegramProcessor.use_telegram(
             config.TELEGRAM_ID or "si-sodo-reduxi"
         )
-        self.reply = GXByteBuffer()
+        # clear() keeps the capacity, so this is allocated once.
+        self.reply = GXByteBuffer(REPLY_CAPACITY)
         self.settings.media.trace = self.settings.trace
-        logging.info(str(self.settings.media))
+        logger.info("%s", self.settings.media)
 
         # Start to listen events from the media.
         self.settings.media.addListener(self)
@@ -230,28 +338,88 @@ class DLMSListener(IGXMediaListener):
         try:
             # Open the connection.
             self.settings.media.open()
-            logging.info("Media opened successfully.")
+            logger.info("Media opened successfully.")
         except Exception as ex:
-            logging.exception(ex)
+            logger.exception(ex)
+
+    @property
+    def translator(self):
+        """XML translator, only built the first time a telegram is logged as XML."""
+        if self._translator is None:
+            translator = GXDLMSTranslator(type_=TranslatorOutputType.SIMPLE_XML)
+            translator.comments = False
+            ciphering = self.settings.client.ciphering
+            if ciphering.authenticationKey:
+                translator.authenticationKey = ciphering.authenticationKey
+            if ciphering.blockCipherKey:
+                translator.blockCipherKey = ciphering.blockCipherKey
+            self._translator = translator
+        return self._translator
 
     def send_to_dbus(self, data):
-        # Pre-allocate a single dictionary with expected capacity
+        # A plain dict is deliberate: at most len(TOPIC_TABLE) paths means only two
+        # small resizes, and a prefilled template would need None-skipping later on.
         updates = {}
         for key, value in data["data"].items():
-            if key in topic_dictionary:
-                raw_topic = topic_dictionary[key]
-                if raw_topic in transform_multiply:
-                    value *= transform_multiply[raw_topic]
-                updates[raw_topic] = value
-
-        # Single D-Bus transaction with all updates
-        if updates:
+            entry = TOPIC_TABLE.get(key)
+            if entry is not None:
+                path, multiplier = entry
+                updates[path] = value * multiplier
+
+        if not updates:
+            return
+        self._pending.update(updates)
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            GLib.timeout_add(DBUS_FLUSH_INTERVAL_MS, self._flush_pending)
+
+    def _flush_pending(self):
+        """
+        Write the paths collected since the last flush in one VeDbusService context.
+
+        Inside the context, VeDbusService only records changed values and emits them
+        as one aggregated ItemsChanged signal on exit, instead of a PropertiesChanged
+        signal per path. Unchanged values are dropped by the service itself.
+
+        Telegrams of a GBT burst are merged into _pending last-write-wins, so a burst
+        costs a single signal at the price of up to DBUS_FLUSH_INTERVAL_MS staleness.
+        Both the serial media and this timeout run on the GLib main loop, so no lock
+        is needed.
+
+        Values equal to the last published one, or within DBUS_FLOAT_TOLERANCE of it
+        for floats, are skipped before the context is entered at all.
+        """
+        self._flush_scheduled = False
+        pending, self._pending = self._pending, {}
+        last_sent = self._last_sent
+        changed = []
+        for path, value in pending.items():
+            old = last_sent.get(path)
+            if old is not None and (
+                old == value
+                or (isinstance(value, float) and abs(old - value) < DBUS_FLOAT_TOLERANCE)
+            ):
+                continue
+            changed.append((path, value))
+            last_sent[path] = value
+
+        if changed:
             with self.dbusservice as s:
-                for path, value in updates.items():
+                for path, value in changed:
                     s[path] = value
+        return False
+
+    def forget_sent(self, path):
+        """
+        Forget the last published value of a path that was written from outside.
+
+        The meter paths are writeable, so the next reading must be sent again even if it
+        equals the one published before the external write.
+        """
+        self._last_sent.pop(path, None)
 
     def onStop(self, sender):
-        logging.info("Stopping DLMS listener.")
+        logger.info("Stopping DLMS listener.")
         self.service_obj._loop.quit()
 
     def onError(self, sender, ex):
@@ -262,76 +430,59 @@ class DLMSListener(IGXMediaListener):
         sender :  The source of the event.
         ex : An Exception object that contains the event data.
         """
-        logging.error("Error has occured. " + str(ex))
-
-    @classmethod
-    def printData(cls, value, offset):
-        sb = " " * 2 * offset
-        if isinstance(value, list):
-            logging.debug(sb + "{")
-            offset = offset + 1
-            # Print received data.
-            for it in value:
-                cls.printData(it, offset)
-            logging.debug(sb + "}")
-            offset = offset - 1
-        elif isinstance(value, bytearray):
-            # Print value.
-            logging.debug(sb + GXCommon.toHex(value))
-        else:
-            # Print value.
-            logging.debug(sb + str(value))
+        logger.error("Error has occured. %s", ex)
 
     def onReceived(self, sender, e):
         # Add received data to buffer
         self.reply.set(e.data)
-        data = GXReplyData()
+        data = self._scratch_reply
+        data.clear()
 
         try:
-            if not self.client.getData(self.reply, data, self.notify):
-                # Only process if complete and no more data expected
-                if self.notify.complete and not self.notify.isMoreData():
-                    # Skip verbose logging in production
-                    if self.trace_level >= TraceLevel.INFO and logging.getLogger().isEnabledFor(
-                        logging.DEBUG
-                    ):
-                        xml = self.translator.dataToXml(self.notify.data)
-                        logging.debug(xml)
-                    else:
-                        xml = self.translator.dataToXml(self.notify.data)
-
-                    try:
-                        self.onData(xml)
-                    except Exception as ex:
-                        logging.warning("Error processing data: %s", ex)
-
-                    # Clear buffers for reuse
-                    self.notify.clear()
-                    self.reply.clear()
+            if self.client.getData(self.reply, data, self.notify):
+                return
         except Exception as ex:
-            logging.error("Error in data reception: %s", ex)
+            logger.error("Error in data reception: %s", ex)
             self.notify.clear()
             self.reply.clear()
+            return
 
-    def onData(self, xml):
+        # Only process if complete and no more data expected
+        if not self.notify.complete or self.notify.isMoreData():
+            return
+
+        try:
+            # Render the telegram as XML only when it is actually logged
+            if self._log_xml:
+                logger.debug(self.translator.dataToXml(self.notify.data))
+            self.onData(self.notify.value)
+        except Exception:
+            logger.exception("Error processing data")
+        finally:
+            # Clear buffers for reuse
+            self.notify.clear()
+            self.reply.clear()
+
+    def onData(self, value):
         """
         Process received data.
+
+        value : Push telegram structure decoded by Gurux.
         """
         try:
             if self.telegram_processor is None:
                 return
             try:
-                payload = self.telegram_processor.process_xml(xml)
+                payload = self.telegram_processor.process_data(value)
             except Exception as ex:
-                logging.info(ex)
+                logger.info(ex)
                 return
             if self.trace_level > TraceLevel.INFO:
-                logging.info(payload)
+                logger.info(payload)
             try:
                 self.send_to_dbus(payload)
             except Exception as ex:
-                logging.error("Error sending data to D-Bus: " + str(ex))
-                logging.error(traceback.format_exc())
+                logger.exception("Error sending data to D-Bus: %s", ex)
         except SystemExit:
             pass
 
@@ -340,7 +491,7 @@ class DLMSListener(IGXMediaListener):
         sender : The source of the event.
         e : Event arguments.
         """
-        logging.info("Media state changed. " + str(e))
+        logger.info("Media state changed. %s", e)
 
     def onTrace(self, sender, e):
         """Called when the Media is sending or receiving data.
@@ -348,7 +499,7 @@ class DLMSListener(IGXMediaListener):
         sender : The source of the event.
         e : Event arguments.
         """
-        logging.info("trace:" + str(e))
+        logger.info("trace:%s", e)
 
     def onPropertyChanged(self, sender, e):
         """
@@ -357,4 +508,4 @@ class DLMSListener(IGXMediaListener):
         sender : The source of the event.
         e : Event arguments.
         """
-        logging.info("Property {!r} has hanged.".format(str(e)))
+        logger.info("Property %r has hanged.", str(e))
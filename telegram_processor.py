@@ -1,7 +1,14 @@
 import logging
+import operator
 import os
+import sys
 
 import yaml
+from gurux_dlms.GXEnum import GXEnum
+from gurux_dlms.GXStructure import GXStructure
+from gurux_dlms.GXUInt16 import GXUInt16
+from gurux_dlms.GXUInt32 import GXUInt32
+from gurux_dlms.GXUInt8 import GXUInt8
 
 try:
     from lxml import etree
@@ -12,28 +19,290 @@ except ImportError:
 
     USES_LXML = False
 
-logging.basicConfig(level=logging.WARNING, format="%(asctime)s [%(levelname)s] %(message)s")
+logger = logging.getLogger(__name__)
+
+# libyaml's C loader when PyYAML was built with it, the pure Python one otherwise
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Telegram content types of the values Gurux decodes from a push notification
+DATA_TYPE_NAMES = {
+    bytearray: "OctetString",
+    bytes: "OctetString",
+    GXUInt32: "UInt32",
+    GXUInt16: "UInt16",
+    GXUInt8: "UInt8",
+    GXEnum: "Enum",
+    bool: "Boolean",
+}
+
+
+# Element type -> converter for the hex Value attribute of translator XML
+XML_PARSERS = {
+    "OctetString": lambda value: bytes.fromhex(value).decode("ascii"),
+    "UInt32": lambda value: int(value, 16),
+    "UInt16": lambda value: int(value, 16),
+    "UInt8": lambda value: int(value, 16),
+    "Enum": lambda value: int(value, 16),
+    "Boolean": lambda value: value == "True",
+}
+
+# Element type -> converter for the values of a decoded GXStructure
+DATA_PARSERS = {
+    "OctetString": lambda value: bytes(value).decode("ascii"),
+    "UInt32": int,
+    "UInt16": int,
+    "UInt8": int,
+    "Enum": int,
+    "Boolean": lambda value: value,
+}
+
+
+def _unsupported_parser(element_type):
+    def parse(_value):
+        logger.warning("Unsupported type %s", element_type)
+
+    return parse
+
+
+# Transformation type -> operation; MULTIPLY_IF_KEY and REPLACE are handled separately
+TRANSFORM_OPERATIONS = {
+    "MULTIPLY": operator.mul,
+    "ADD": operator.add,
+    "SUBTRACT": operator.sub,
+    "DIVIDE": operator.truediv,
+}
+TRANSFORM_CONVERSIONS = {"TO_INTEGER": int, "TO_STRING": str, "TO_FLOAT": float}
+TRANSFORM_COMPARATORS = {
+    "GT": operator.gt,
+    "GTE": operator.ge,
+    "LT": operator.lt,
+    "LTE": operator.le,
+    "EQ": operator.eq,
+    "NEQ": operator.ne,
+}
+
+
+def _compile_transform(transform):
+    """
+    Specialize one configured transformation into ``fn(payload) -> (key, value) | None``.
+
+    Returns None for transformations that can never produce a value.
+    """
+    transform_type = transform["type"]
+    # Payload keys are interned names (see use_telegram); match them by identity
+    key = sys.intern(transform["key"])
+
+    if transform_type in TRANSFORM_OPERATIONS:
+        operation = TRANSFORM_OPERATIONS[transform_type]
+        operand = transform["value"]
+
+        def apply(payload):
+            key_value = payload.get(key)
+            return None if key_value is None else (key, operation(key_value, operand))
+
+    elif transform_type in TRANSFORM_CONVERSIONS:
+        convert = TRANSFORM_CONVERSIONS[transform_type]
+
+        def apply(payload):
+            key_value = payload.get(key)
+            return None if key_value is None else (key, convert(key_value))
+
+    elif transform_type == "REPLACE":
+        replacement = transform["value"]
+        if replacement is None:
+            return None
+
+        def apply(payload):
+            return None if payload.get(key) is None else (key, replacement)
+
+    elif transform_type == "MULTIPLY_IF_KEY":
+        compare = TRANSFORM_COMPARATORS.get(transform["operand"])
+        if compare is None:
+            return None
+        transform_key = sys.intern(transform["transform_key"])
+        compare_value = transform["value"]
+        multiplier = transform["multiplier"]
+
+        def apply(payload):
+            key_value = payload.get(key)
+            if key_value is None:
+                return None
+            val_to_transform = payload.get(transform_key)
+            if val_to_transform is None or not compare(key_value, compare_value):
+                return None
+            return transform_key, val_to_transform * multiplier
+
+    else:
+        return None
+
+    return apply
+
+
+# Per-phase payload keys, built and interned once instead of formatted for every
+# telegram: (phase, total power, import power, export power, voltage, current, PF,
+# PF direction)
+_PHASES = ("L1", "L2", "L3")
+_POWER_KEYS = tuple(
+    tuple(
+        map(
+            sys.intern,
+            (
+                p,
+                f"ACTIVE_POWER_TOTAL_{p}",
+                f"ACTIVE_POWER_IMPORT_{p}",
+                f"ACTIVE_POWER_EXPORT_{p}",
+                f"VOLTAGE_{p}",
+                f"CURRENT_{p}",
+                f"POWER_FACTOR_{p}",
+                f"POWER_FACTOR_{p}_DIRECTION",
+            ),
+        )
+    )
+    for p in _PHASES
+)
+
+
+def _power_factor(real_power, apparent_power):
+    """Power factor clamped to [-1, 1]; apparent_power must be non-zero."""
+    pf = real_power / apparent_power
+    # Plain comparisons; max(min()) costs two builtin calls per value
+    return 1.0 if pf > 1.0 else (-1.0 if pf < -1.0 else pf)
+
+
+def _difference(target, minuend, subtrahend):
+    def derive(payload):
+        value_a = payload.get(minuend)
+        value_b = payload.get(subtrahend)
+        if value_a is not None and value_b is not None:
+            payload[target] = value_a - value_b
+
+    return derive
+
+
+def _phase_sum(target, keys):
+    key_l1, key_l2, key_l3 = keys
+
+    def derive(payload):
+        value_l1 = payload.get(key_l1)
+        value_l2 = payload.get(key_l2)
+        value_l3 = payload.get(key_l3)
+        if value_l1 is not None and value_l2 is not None and value_l3 is not None:
+            payload[target] = value_l1 + value_l2 + value_l3
+
+    return derive
+
+
+def _derive_power_factors(payload):
+    # Calculate power factor for each phase and total
+    valid_phases = []
+    for _, total_key, _, _, voltage_key, current_key, pf_key, pf_dir_key in _POWER_KEYS:
+        voltage = payload.get(voltage_key)
+        current = payload.get(current_key)
+        real_power = payload.get(total_key)
+
+        if voltage is not None and current is not None and real_power is not None:
+            valid_phases.append((pf_key, pf_dir_key, voltage, current, real_power))
+
+    if len(valid_phases) not in (1, 3):
+        logger.warning("Unsupported number of valid power phases. Expected 1 or 3.")
+        return  # Skip PF calculation entirely
+
+    pf_total_numerator = 0.0
+    pf_total_denominator = 0.0
+    phase_factors = []
+
+    # Values are numeric unless a telegram or transformation is misconfigured; check
+    # that once here instead of guarding every phase. Nothing is written to the payload
+    # until every phase has been computed, so a bad value leaves no partial result.
+    try:
+        for pf_key, pf_dir_key, voltage, current, real_power in valid_phases:
+            apparent_power = abs(voltage * current)
+            if apparent_power < 1e-2:
+                continue  # Skip unreliable values
+
+            phase_factors.append((pf_key, pf_dir_key, _power_factor(real_power, apparent_power)))
+
+            pf_total_numerator += real_power
+            pf_total_denominator += apparent_power
+    except TypeError as e:
+        logger.warning("Skipping PF calc: %s", e)
+        return
+
+    for pf_key, pf_dir_key, pf_clamped in phase_factors:
+        payload[pf_key] = round(pf_clamped, 3)
+        payload[pf_dir_key] = "lagging" if pf_clamped >= 0 else "leading"
+
+    if pf_total_denominator >= 1e-2:
+        total_pf_clamped = _power_factor(pf_total_numerator, pf_total_denominator)
+        payload["POWER_FACTOR_TOTAL"] = round(total_pf_clamped, 3)
+        payload["POWER_FACTOR_TOTAL_DIRECTION"] = "lagging" if total_pf_clamped >= 0 else "leading"
+
+
+def _plan_derivations(names):
+    """
+    Select the derived values a telegram with these element names can produce.
+
+    Every element of a matched telegram is present in its payload, so a derivation
+    whose target is already delivered, or whose sources never are, is dropped here
+    instead of being re-checked on every telegram.
+    """
+    imports = tuple(keys[2] for keys in _POWER_KEYS)
+    exports = tuple(keys[3] for keys in _POWER_KEYS)
+    currents = tuple(keys[5] for keys in _POWER_KEYS)
+    candidates = [
+        # Phase power from import and export
+        *(
+            (total_key, (import_key, export_key), _difference(total_key, import_key, export_key))
+            for _, total_key, import_key, export_key, _, _, _, _ in _POWER_KEYS
+        ),
+        # Totals from the phases
+        ("ACTIVE_POWER_IMPORT", imports, _phase_sum("ACTIVE_POWER_IMPORT", imports)),
+        ("ACTIVE_POWER_EXPORT", exports, _phase_sum("ACTIVE_POWER_EXPORT", exports)),
+        (
+            "ACTIVE_POWER_TOTAL",
+            ("ACTIVE_POWER_IMPORT", "ACTIVE_POWER_EXPORT"),
+            _difference("ACTIVE_POWER_TOTAL", "ACTIVE_POWER_IMPORT", "ACTIVE_POWER_EXPORT"),
+        ),
+        ("CURRENT_TOTAL", currents, _phase_sum("CURRENT_TOTAL", currents)),
+    ]
+
+    available = set(names)
+    derivations = []
+    for target, sources, derive in candidates:
+        if target not in available and available.issuperset(sources):
+            derivations.append(derive)
+            available.add(target)
+
+    # Power factors need voltage, current and power of at least one phase
+    if any(available.issuperset((keys[4], keys[5], keys[1])) for keys in _POWER_KEYS):
+        derivations.append(_derive_power_factors)
+    return derivations
 
 
 class TelegramProcessor:
     def __init__(self) -> None:
         # Load configs once during initialization
         config_path = os.path.join(os.path.dirname(__file__), "telegrams/default.yml")
-        with open(config_path, "r", encoding="utf-8") as f:
-            self._default_config = yaml.safe_load(f)
+        with open(config_path, "rb") as f:
+            self._default_config = yaml.load(f, Loader=YAML_LOADER)
 
         self.available_telegrams = {}
         self.config = self._default_config
+        self._transforms = []
         self.selected_telegram = None
         self._is_telegram_length_unique = {}
         self._telegram_structure_hash = {}
+        # (length, tag hash) -> telegram definition, plus the last hit on its own
+        self._structure_cache = {}
+        self._last_structure_key = None
+        self._last_structure = None
 
         # Load all telegram definitions at once
         telegram_dir = os.path.join(os.path.dirname(__file__), "telegrams")
         for filename in os.listdir(telegram_dir):
             if filename.endswith(".yml") and filename != "default.yml":
-                with open(os.path.join(telegram_dir, filename), "r", encoding="utf-8") as f:
-                    content = yaml.safe_load(f)
+                with open(os.path.join(telegram_dir, filename), "rb") as f:
+                    content = yaml.load(f, Loader=YAML_LOADER)
                     if "info" in content and "id" in content["info"]:
                         self.available_telegrams[content["info"]["id"]] = content
 
@@ -52,8 +321,41 @@ class TelegramProcessor:
         self.config = self._default_config.copy()  # Use copy to avoid modifying original
         self.config.update(self.selected_telegram)
 
+        # The transformation list is fixed from here on; resolve types and operands once
+        self._transforms = [
+            transform
+            for transform in map(_compile_transform, self.config.get("transformations", []))
+            if transform is not None
+        ]
+
         # Pre-compute telegram lookup data
         for telegram in self.selected_telegram["telegrams"]:
+            # Payload keys are the element names; interning them makes the D-Bus
+            # topic lookup downstream hit on identity instead of comparing strings.
+            for element in telegram["contents"]:
+                element["name"] = sys.intern(element["name"])
+
+            # Index element names and types by position so parsing is a list lookup
+            size = max((e["position"] for e in telegram["contents"]), default=-1) + 1
+            telegram["_name_by_pos"] = [None] * size
+            telegram["_type_by_pos"] = [None] * size
+            for element in telegram["contents"]:
+                position = element["position"]
+                if telegram["_name_by_pos"][position] is not None:
+                    continue  # First definition wins, as with the old linear search
+                telegram["_name_by_pos"][position] = element["name"]
+                if "type" in element:
+                    telegram["_type_by_pos"][position] = sys.intern(element["type"])
+
+            # Bind the converter of each position once instead of dispatching per value
+            for key, parsers in (("_xml_parsers", XML_PARSERS), ("_data_parsers", DATA_PARSERS)):
+                telegram[key] = [
+                    parsers.get(t) or _unsupported_parser(t) if t is not None else None
+                    for t in telegram["_type_by_pos"]
+                ]
+
+            telegram["_derivations"] = _plan_derivations(telegram["_name_by_pos"])
+
             telegram_length = telegram["length"]
             self._is_telegram_length_unique[telegram_length] = (
                 telegram_length not in self._is_telegram_length_unique
@@ -75,43 +377,77 @@ class TelegramProcessor:
         if root.tag != "Structure":
             raise ValueError("Invalid XML format")
 
-        # Find matching telegram structure
         telegram_length = int(root.attrib.get("Qty"), 16)
-        telegram_structure = self._get_structure(telegram_length, root)
+        tags = [child.tag for child in root]
+        values = (child.attrib["Value"] for child in root)
+        return self._process(telegram_length, tags, values, "_xml_parsers")
+
+    def process_data(self, structure):
+        """
+        Process a push telegram already decoded by Gurux (``GXReplyData.value``).
+
+        Gives the same result as process_xml without rendering the telegram to XML
+        and parsing it back.
+        """
+        if not isinstance(structure, GXStructure):
+            raise ValueError("Invalid data format")
+
+        tags = [DATA_TYPE_NAMES.get(type(value), type(value).__name__) for value in structure]
+        return self._process(len(structure), tags, structure, "_data_parsers")
+
+    def _process(self, telegram_length, tags, values, parsers):
+        # Find matching telegram structure
+        telegram_structure = self._get_structure(telegram_length, tags)
         if telegram_structure is None:
-            logging.error(f"Telegram with length {telegram_length} not found")
+            logger.error("Telegram with length %s not found", telegram_length)
             raise ValueError("Unknown telegram")
 
         # Pre-allocate result dictionary with expected size
         payload = {}
 
         # Parse elements more efficiently
-        for i, child in enumerate(root):
+        for i, (tag, value) in enumerate(zip(tags, values)):
             try:
                 # Direct assignment instead of update reduces dict operations
-                element_data = self._parse_element(i, child, telegram_structure)
+                element_data = self._parse_element(i, tag, value, telegram_structure, parsers)
                 if element_data:
                     name, value = element_data
                     payload[name] = value
             except ValueError as e:
-                logging.error(f"Error parsing element {i}: {e}")
+                logger.error("Error parsing element %d: %s", i, e)
                 raise e
 
         # Apply transformations from config
-        transformations = self.config.get("transformations", [])
-        if transformations:
-            for transform in transformations:
-                result = self._do_transform(payload, transform)
-                if result:
-                    key, val = result
-                    payload[key] = val
+        for transform in self._transforms:
+            result = transform(payload)
+            if result:
+                key, val = result
+                payload[key] = val
 
         # Apply generic transforms (power calculations)
-        self._generic_transform(payload)
+        self._generic_transform(payload, telegram_structure["_derivations"])
 
         return {"name": telegram_structure["name"], "data": payload}
 
-    def _get_structure(self, telegram_length, root):
+    def _get_structure(self, telegram_length, tags):
+        tag_hash = hash("".join(tags))
+        key = (telegram_length, tag_hash)
+        # A meter keeps sending the same few telegrams; usually it is the last one again
+        if key == self._last_structure_key:
+            return self._last_structure
+
+        definition = self._structure_cache.get(key)
+        if definition is None:
+            definition = self._find_structure(telegram_length, tag_hash)
+            if definition is None:
+                return None
+            self._structure_cache[key] = definition
+
+        self._last_structure_key = key
+        self._last_structure = definition
+        return definition
+
+    def _find_structure(self, telegram_length, tag_hash):
         # Fast path: unique length match
         if (
             telegram_length in self._is_telegram_length_unique
@@ -122,7 +458,6 @@ class TelegramProcessor:
                     return definition
 
         # Slower path: check structure hash
-        tag_hash = hash("".join(x.tag for x in root))
         telegram_name = self._telegram_structure_hash.get(tag_hash)
         if telegram_name:
             for definition in self.selected_telegram["telegrams"]:
@@ -131,173 +466,20 @@ class TelegramProcessor:
 
         return None
 
-    def _parse_element(self, position, child, telegram_structure):
-        # Find matching element definition by position
-        element = None
-        for e in telegram_structure["contents"]:
-            if e["position"] == position:
-                element = e
-                break
-
-        if not element or "type" not in element:
+    def _parse_element(self, position, tag, value, telegram_structure, parsers):
+        types = telegram_structure["_type_by_pos"]
+        element_type = types[position] if position < len(types) else None
+        if element_type is None:
             raise ValueError("Element missing type in definition")
 
-        if child.tag != element["type"]:
-            raise ValueError(f"Expected tag {element['type']} but got {child.tag}")
-
-        # More efficient value parsing
-        element_type = element["type"]
-        value_attr = child.attrib["Value"]
-
-        if element_type == "OctetString":
-            # Avoid intermediate bytes object when possible
-            value = bytes.fromhex(value_attr).decode("ascii")
-        elif element_type in ["UInt32", "UInt16", "UInt8", "Enum"]:
-            value = int(value_attr, 16)
-        elif element_type == "Boolean":
-            value = value_attr == "True"
-        else:
-            logging.warning(f"Unsupported type {element_type}")
-            value = None
+        if tag != element_type:
+            raise ValueError(f"Expected tag {element_type} but got {tag}")
 
         # Return tuple instead of dict to avoid allocation
-        return element["name"], value
-
-    def _do_transform(self, payload, transform):
-        transform_type = transform["type"]
-        key = transform["key"]
-        key_value = payload.get(key)
+        name = telegram_structure["_name_by_pos"][position]
+        return name, telegram_structure[parsers][position](value)
 
-        if key_value is None:
-            return None
-
-        output_key = key  # Default to the same key
-        output_val = None
-
-        # Process transformation based on type
-        if transform_type == "MULTIPLY":
-            output_val = key_value * transform["value"]
-        elif transform_type == "ADD":
-            output_val = key_value + transform["value"]
-        elif transform_type == "SUBTRACT":
-            output_val = key_value - transform["value"]
-        elif transform_type == "DIVIDE":
-            output_val = key_value / transform["value"]
-        elif transform_type == "REPLACE":
-            output_val = transform["value"]
-        elif transform_type == "TO_INTEGER":
-            output_val = int(key_value)
-        elif transform_type == "TO_STRING":
-            output_val = str(key_value)
-        elif transform_type == "TO_FLOAT":
-            output_val = float(key_value)
-        elif transform_type == "MULTIPLY_IF_KEY":
-            transform_key = transform["transform_key"]
-            output_key = transform_key
-            val_to_transform = payload.get(transform_key)
-
-            if val_to_transform is None:
-                return None
-
-            operand = transform["operand"]
-            compare_value = transform["value"]
-            multiplier = transform["multiplier"]
-
-            # Optimize comparison operations
-            if (
-                (operand == "GT" and key_value > compare_value)
-                or (operand == "GTE" and key_value >= compare_value)
-                or (operand == "LT" and key_value < compare_value)
-                or (operand == "LTE" and key_value <= compare_value)
-                or (operand == "EQ" and key_value == compare_value)
-                or (operand == "NEQ" and key_value != compare_value)
-            ):
-                output_val = val_to_transform * multiplier
-
-        return (output_key, output_val) if output_val is not None else None
-
-    def _generic_transform(self, payload):
-        # Optimize phase power calculations
-        for phase in ("L1", "L2", "L3"):
-            power_total_key = f"ACTIVE_POWER_TOTAL_{phase}"
-            if power_total_key not in payload:
-                import_key = f"ACTIVE_POWER_IMPORT_{phase}"
-                export_key = f"ACTIVE_POWER_EXPORT_{phase}"
-                if import_key in payload and export_key in payload:
-                    payload[power_total_key] = payload[import_key] - payload[export_key]
-
-        # Calculate total import if needed
-        if "ACTIVE_POWER_IMPORT" not in payload:
-            import_l1 = payload.get("ACTIVE_POWER_IMPORT_L1")
-            import_l2 = payload.get("ACTIVE_POWER_IMPORT_L2")
-            import_l3 = payload.get("ACTIVE_POWER_IMPORT_L3")
-            if import_l1 is not None and import_l2 is not None and import_l3 is not None:
-                payload["ACTIVE_POWER_IMPORT"] = import_l1 + import_l2 + import_l3
-
-        # Calculate total export if needed
-        if "ACTIVE_POWER_EXPORT" not in payload:
-            export_l1 = payload.get("ACTIVE_POWER_EXPORT_L1")
-            export_l2 = payload.get("ACTIVE_POWER_EXPORT_L2")
-            export_l3 = payload.get("ACTIVE_POWER_EXPORT_L3")
-            if export_l1 is not None and export_l2 is not None and export_l3 is not None:
-                payload["ACTIVE_POWER_EXPORT"] = export_l1 + export_l2 + export_l3
-
-        # Calculate total power if needed
-        if "ACTIVE_POWER_TOTAL" not in payload:
-            power_import = payload.get("ACTIVE_POWER_IMPORT")
-            power_export = payload.get("ACTIVE_POWER_EXPORT")
-            if power_import is not None and power_export is not None:
-                payload["ACTIVE_POWER_TOTAL"] = power_import - power_export
-
-        # Calculate total current if needed
-        if "CURRENT_TOTAL" not in payload:
-            current_l1 = payload.get("CURRENT_L1")
-            current_l2 = payload.get("CURRENT_L2")
-            current_l3 = payload.get("CURRENT_L3")
-            if current_l1 is not None and current_l2 is not None and current_l3 is not None:
-                payload["CURRENT_TOTAL"] = current_l1 + current_l2 + current_l3
-
-        # Calculate power factor for each phase and total
-        valid_phases = []
-        for phase in ("L1", "L2", "L3"):
-            voltage = payload.get(f"VOLTAGE_{phase}")
-            current = payload.get(f"CURRENT_{phase}")
-            real_power = payload.get(f"ACTIVE_POWER_TOTAL_{phase}")
-
-            if voltage is not None and current is not None and real_power is not None:
-                valid_phases.append((phase, voltage, current, real_power))
-
-        if len(valid_phases) not in (1, 3):
-            logging.warning("Unsupported number of valid power phases. Expected 1 or 3.")
-            return  # Skip PF calculation entirely
-
-        pf_total_numerator = 0.0
-        pf_total_denominator = 0.0
-
-        for phase, voltage, current, real_power in valid_phases:
-            try:
-                apparent_power = abs(voltage * current)
-                if apparent_power < 1e-2:
-                    continue  # Skip unreliable values
-
-                pf = real_power / apparent_power
-                pf_clamped = max(min(pf, 1.0), -1.0)
-
-                payload[f"POWER_FACTOR_{phase}"] = round(pf_clamped, 3)
-                payload[f"POWER_FACTOR_{phase}_DIRECTION"] = (
-                    "lagging" if pf_clamped >= 0 else "leading"
-                )
-
-                pf_total_numerator += real_power
-                pf_total_denominator += apparent_power
-
-            except Exception as e:
-                logging.warning(f"Skipping PF calc for {phase}: {e}")
-
-        if pf_total_denominator >= 1e-2:
-            total_pf = pf_total_numerator / pf_total_denominator
-            total_pf_clamped = max(min(total_pf, 1.0), -1.0)
-            payload["POWER_FACTOR_TOTAL"] = round(total_pf_clamped, 3)
-            payload["POWER_FACTOR_TOTAL_DIRECTION"] = (
-                "lagging" if total_pf_clamped >= 0 else "leading"
-            )
+    def _generic_transform(self, payload, derivations):
+        # Derived power values; use_telegram keeps only those this telegram can produce
+        for derive in derivations:
+            derive(payload)
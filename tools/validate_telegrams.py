@@ -7,186 +7,297 @@ Validate telegram template files under ./telegrams according to project rules:
 - Telegram "length" matches number of contents and positions are contiguous
 - Telegram content types are valid
 
+With --fast, each file stops at its first error; enough for a pass/fail gate.
+
 Exit code: 0 on success, 1 if any errors were found.
 """
 from __future__ import annotations
 
+import argparse
 import glob
+import mmap
 import os
 import sys
-from typing import Any, Dict, List
+from typing import Any, Callable
 
 import yaml
 
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader
+
 # Types supported by telegram_processor.py
-VALID_CONTENT_TYPES = {
-    "OctetString",
-    "UInt32",
-    "UInt16",
-    "UInt8",
-    "Enum",
-    "Boolean",
-}
+VALID_CONTENT_TYPES = frozenset(
+    {
+        "OctetString",
+        "UInt32",
+        "UInt16",
+        "UInt8",
+        "Enum",
+        "Boolean",
+    }
+)
 
 # Transformations supported by telegram_processor.py
-VALID_TRANSFORM_TYPES = {
-    "MULTIPLY",
-    "ADD",
-    "SUBTRACT",
-    "DIVIDE",
-    "REPLACE",
-    "TO_INTEGER",
-    "TO_STRING",
-    "TO_FLOAT",
-    "MULTIPLY_IF_KEY",
+VALID_TRANSFORM_TYPES = frozenset(
+    {
+        "MULTIPLY",
+        "ADD",
+        "SUBTRACT",
+        "DIVIDE",
+        "REPLACE",
+        "TO_INTEGER",
+        "TO_STRING",
+        "TO_FLOAT",
+        "MULTIPLY_IF_KEY",
+    }
+)
+
+# Transformation types that need a "value" operand
+VALUE_REQUIRING = frozenset({"MULTIPLY", "ADD", "SUBTRACT", "DIVIDE", "REPLACE"})
+
+# Fields MULTIPLY_IF_KEY needs, in the order missing ones are reported
+MULTIPLY_IF_KEY_REQUIRED = ("operand", "value", "multiplier", "transform_key")
+
+# Comparison operands accepted by MULTIPLY_IF_KEY
+OPERANDS = frozenset({"GT", "GTE", "LT", "LTE", "EQ", "NEQ"})
+
+# Templates below this size are read in one go; larger ones are memory-mapped
+READ_WHOLE_MAX_BYTES = 256 * 1024
+
+REQUIRED_INFO_FIELDS = frozenset(
+    {
+        "id",
+        "name",
+        "distributer",
+        "country",
+        "supported_interfaces",
+        "multiple_telegrams",
+        "required_keys",
+    }
+)
+
+# Info fields with a fixed type: field -> (type, description used in the error)
+INFO_FIELD_TYPES = {
+    "supported_interfaces": (list, "a list"),
+    "multiple_telegrams": (bool, "a boolean"),
+    "required_keys": (list, "a list"),
 }
 
-REQUIRED_INFO_FIELDS = {
-    "id",
-    "name",
-    "distributer",
-    "country",
-    "supported_interfaces",
-    "multiple_telegrams",
-    "required_keys",
-}
 
+# Default for dict.get() that tells an absent field from one set to null
+_MISSING = object()
 
-def _err(errors: List[str], path: str, msg: str) -> None:
-    errors.append(f"{path}: {msg}")
+# (path, message) pairs; the two are only joined when the report is printed
+Error = tuple[str, str]
 
 
-def validate_info(doc: Dict[str, Any], path: str, errors: List[str]) -> None:
-    if not isinstance(doc, dict):
-        _err(errors, path, "YAML root must be a mapping")
-        return
+class _StopFile(Exception):
+    """Raised in --fast mode once a file has its first error."""
+
 
-    version = doc.get("version")
+def _check_info(version: Any, info: Any, path: str, append: Callable[[Error], None]) -> None:
     if not isinstance(version, str):
-        _err(errors, path, 'Missing or invalid "version" (expected string)')
+        append((path, 'Missing or invalid "version" (expected string)'))
 
-    info = doc.get("info")
     if not isinstance(info, dict):
-        _err(errors, path, 'Missing or invalid "info" (expected mapping)')
+        append((path, 'Missing or invalid "info" (expected mapping)'))
         return
 
     # All required info fields must be present
     missing = [k for k in REQUIRED_INFO_FIELDS if k not in info]
     if missing:
-        _err(errors, path, f"Missing required info fields: {', '.join(sorted(missing))}")
+        append((path, f"Missing required info fields: {', '.join(sorted(missing))}"))
 
     # Validate field types
-    if "supported_interfaces" in info and not isinstance(info["supported_interfaces"], list):
-        _err(errors, path, "info.supported_interfaces must be a list")
-    if "multiple_telegrams" in info and not isinstance(info["multiple_telegrams"], bool):
-        _err(errors, path, "info.multiple_telegrams must be a boolean")
-    if "required_keys" in info and not isinstance(info["required_keys"], list):
-        _err(errors, path, "info.required_keys must be a list")
+    for field, (expected, description) in INFO_FIELD_TYPES.items():
+        if field in info and not isinstance(info[field], expected):
+            append((path, f"info.{field} must be {description}"))
 
 
-def validate_transformations(doc: Dict[str, Any], path: str, errors: List[str]) -> None:
-    transforms = doc.get("transformations", [])
+def _check_transformations(transforms: Any, path: str, append: Callable[[Error], None]) -> None:
     if transforms in (None, {}):
         transforms = []
 
     if not isinstance(transforms, list):
-        _err(errors, path, "transformations must be a list when present")
+        append((path, "transformations must be a list when present"))
         return
 
+    valid_types = VALID_TRANSFORM_TYPES  # local alias for the per-item lookup
     for i, t in enumerate(transforms):
         if not isinstance(t, dict):
-            _err(errors, path, f"transformations[{i}] must be a mapping")
+            append((path, f"transformations[{i}] must be a mapping"))
             continue
         ttype = t.get("type")
-        if ttype not in VALID_TRANSFORM_TYPES:
-            _err(errors, path, f"transformations[{i}].type invalid: {ttype!r}")
+        if ttype not in valid_types:
+            append((path, f"transformations[{i}].type invalid: {ttype!r}"))
             continue
         # Common key check
         if "key" not in t:
-            _err(errors, path, f"transformations[{i}] missing required field: key")
+            append((path, f"transformations[{i}] missing required field: key"))
 
         # Per-type requirements
-        if ttype in {"MULTIPLY", "ADD", "SUBTRACT", "DIVIDE", "REPLACE"}:
+        if ttype in VALUE_REQUIRING:
             if "value" not in t:
-                _err(errors, path, f"transformations[{i}] type {ttype} requires 'value'")
+                append((path, f"transformations[{i}] type {ttype} requires 'value'"))
         if ttype == "MULTIPLY_IF_KEY":
-            for req in ("operand", "value", "multiplier", "transform_key"):
+            for req in MULTIPLY_IF_KEY_REQUIRED:
                 if req not in t:
-                    _err(
-                        errors, path, f"transformations[{i}] type MULTIPLY_IF_KEY requires '{req}'"
-                    )
+                    append((path, f"transformations[{i}] type MULTIPLY_IF_KEY requires '{req}'"))
             # Sanity check operand
-            if "operand" in t and t["operand"] not in {"GT", "GTE", "LT", "LTE", "EQ", "NEQ"}:
-                _err(errors, path, f"transformations[{i}].operand invalid: {t['operand']!r}")
+            if "operand" in t and t["operand"] not in OPERANDS:
+                append((path, f"transformations[{i}].operand invalid: {t['operand']!r}"))
 
 
-def validate_telegrams(doc: Dict[str, Any], path: str, errors: List[str]) -> None:
-    telegrams = doc.get("telegrams")
+def _check_telegrams(
+    telegrams: Any, info: dict[str, Any], path: str, append: Callable[[Error], None]
+) -> None:
     if telegrams is None:
-        _err(errors, path, 'Missing "telegrams" list')
+        append((path, 'Missing "telegrams" list'))
         return
     if not isinstance(telegrams, list):
-        _err(errors, path, '"telegrams" must be a list')
+        append((path, '"telegrams" must be a list'))
         return
 
-    info = doc.get("info", {}) if isinstance(doc.get("info"), dict) else {}
     multi_flag = info.get("multiple_telegrams")
     if len(telegrams) > 1 and multi_flag is not True:
-        _err(errors, path, "multiple telegrams declared but info.multiple_telegrams is not true")
+        append((path, "multiple telegrams declared but info.multiple_telegrams is not true"))
 
+    valid_types = VALID_CONTENT_TYPES  # local alias for the per-content lookup
     for ti, tg in enumerate(telegrams):
         if not isinstance(tg, dict):
-            _err(errors, path, f"telegrams[{ti}] must be a mapping")
+            append((path, f"telegrams[{ti}] must be a mapping"))
             continue
         name = tg.get("name")
         if not isinstance(name, str) or not name:
-            _err(errors, path, f"telegrams[{ti}].name missing or invalid")
+            append((path, f"telegrams[{ti}].name missing or invalid"))
         length = tg.get("length")
         if not isinstance(length, int) or length < 0:
-            _err(
-                errors,
-                path,
-                f"telegrams[{ti}].length missing or invalid (expected non-negative int)",
-            )
+            append((path, f"telegrams[{ti}].length missing or invalid (expected non-negative int)"))
             continue
         contents = tg.get("contents")
         if not isinstance(contents, list):
-            _err(errors, path, f"telegrams[{ti}].contents must be a list")
+            append((path, f"telegrams[{ti}].contents must be a list"))
             continue
 
         # Length must match number of items in contents
         if length != len(contents):
-            _err(errors, path, f"telegrams[{ti}] length {length} != contents size {len(contents)}")
+            append((path, f"telegrams[{ti}] length {length} != contents size {len(contents)}"))
 
-        # Positions should be contiguous 0..N-1 and unique
-        positions = []
+        # Positions should be contiguous 0..N-1 and unique: one bit per position, where a
+        # full mask means every slot was hit exactly once and -1 marks a bad position
+        size = len(contents)
+        seen = 0
         for ci, c in enumerate(contents):
             if not isinstance(c, dict):
-                _err(errors, path, f"telegrams[{ti}].contents[{ci}] must be a mapping")
+                append((path, f"telegrams[{ti}].contents[{ci}] must be a mapping"))
                 continue
-            for field in ("position", "name", "type"):
-                if field not in c:
-                    _err(errors, path, f"telegrams[{ti}].contents[{ci}] missing '{field}'")
+            # Each field is fetched once; the sentinel keeps "absent" apart from null
+            pos = c.get("position", _MISSING)
+            ctype = c.get("type", _MISSING)
+            if pos is _MISSING:
+                append((path, f"telegrams[{ti}].contents[{ci}] missing 'position'"))
+            if "name" not in c:
+                append((path, f"telegrams[{ti}].contents[{ci}] missing 'name'"))
+            if ctype is _MISSING:
+                append((path, f"telegrams[{ti}].contents[{ci}] missing 'type'"))
+                ctype = None
             # Validate type is allowed
-            ctype = c.get("type")
-            if ctype not in VALID_CONTENT_TYPES:
-                _err(errors, path, f"telegrams[{ti}].contents[{ci}].type invalid: {ctype!r}")
-            # Accumulate positions
-            pos = c.get("position")
+            if ctype not in valid_types:
+                append((path, f"telegrams[{ti}].contents[{ci}].type invalid: {ctype!r}"))
             if isinstance(pos, int):
-                positions.append(pos)
-
-        if positions:
-            expected = list(range(len(contents)))
-            if sorted(positions) != expected:
-                _err(
-                    errors,
+                bit = 1 << pos if 0 <= pos < size else 0
+                seen = -1 if not bit or seen & bit else seen | bit
+
+        # seen stays 0 only when no content carries an integer position
+        if seen and seen != (1 << size) - 1:
+            # Only a failing telegram pays for collecting its positions for the message
+            got = sorted(
+                c["position"]
+                for c in contents
+                if isinstance(c, dict) and isinstance(c.get("position"), int)
+            )
+            append(
+                (
                     path,
-                    f"telegrams[{ti}] positions must be contiguous 0..{len(contents)-1} and unique (got {sorted(positions)})",
+                    f"telegrams[{ti}] positions must be contiguous 0..{size-1} and unique (got {got})",
                 )
+            )
+
+
+def _check_template(doc: Any, path: str, append: Callable[[Error], None]) -> None:
+    """Check a whole template, reading each top-level section once."""
+    if not isinstance(doc, dict):
+        append((path, "YAML root must be a mapping"))
+        return
+
+    info = doc.get("info")
+    _check_info(doc.get("version"), info, path, append)
+    _check_transformations(doc.get("transformations", []), path, append)
+    _check_telegrams(doc.get("telegrams"), info if isinstance(info, dict) else {}, path, append)
+
+
+def validate_info(doc: dict[str, Any], path: str, errors: list[Error]) -> None:
+    if not isinstance(doc, dict):
+        errors.append((path, "YAML root must be a mapping"))
+        return
+    _check_info(doc.get("version"), doc.get("info"), path, errors.append)
+
+
+def validate_transformations(doc: dict[str, Any], path: str, errors: list[Error]) -> None:
+    _check_transformations(doc.get("transformations", []), path, errors.append)
+
+
+def validate_telegrams(doc: dict[str, Any], path: str, errors: list[Error]) -> None:
+    info = doc.get("info")
+    _check_telegrams(
+        doc.get("telegrams"), info if isinstance(info, dict) else {}, path, errors.append
+    )
+
+
+def _load_yaml(path: str) -> Any:
+    # Bytes go straight to libyaml, which does its own UTF-8 decoding
+    # Unbuffered, so a small file arrives in a single read() instead of buffer refills
+    with open(path, "rb", buffering=0) as fh:
+        if os.fstat(fh.fileno()).st_size < READ_WHOLE_MAX_BYTES:
+            return yaml.load(fh.read(), Loader=SafeLoader)
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return yaml.load(mapped, Loader=SafeLoader)
+
+
+def _append_first(errors: list[Error]) -> Callable[[Error], None]:
+    """Append for --fast mode: records the error, then ends validation of the file."""
+
+    def append(error: Error) -> None:
+        errors.append(error)
+        raise _StopFile
+
+    return append
+
+
+def validate_file(path: str, fast: bool = False) -> list[Error]:
+    try:
+        doc = _load_yaml(path)
+    except Exception as ex:
+        return [(path, f"YAML load error: {ex}")]
+
+    errors: list[Error] = []
+    append = _append_first(errors) if fast else errors.append
+    try:
+        _check_template(doc, path, append)
+    except _StopFile:
+        pass
+    return errors
 
 
 def main() -> int:
+    parser = argparse.ArgumentParser(description="Validate telegram template files.")
+    parser.add_argument(
+        "--fast", action="store_true", help="stop each file at its first error (pass/fail only)"
+    )
+    args = parser.parse_args()
+
     base = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
     pattern = os.path.join(base, "telegrams", "*.yml")
     files = sorted(glob.glob(pattern))
@@ -195,24 +306,14 @@ def main() -> int:
         print("No telegram YAML files found.")
         return 0
 
-    errors: List[str] = []
-
+    errors: list[Error] = []
     for path in files:
-        try:
-            with open(path, "r", encoding="utf-8") as fh:
-                doc = yaml.safe_load(fh)
-        except Exception as ex:
-            _err(errors, path, f"YAML load error: {ex}")
-            continue
-
-        validate_info(doc, path, errors)
-        validate_transformations(doc, path, errors)
-        validate_telegrams(doc, path, errors)
+        errors.extend(validate_file(path, args.fast))
 
     if errors:
         print("Telegram template validation failed:")
-        for e in errors:
-            print(f" - {e}")
+        for err_path, message in errors:
+            print(f" - {err_path}: {message}")
         return 1
 
     print(f"Validated {len(files)} telegram YAML files successfully.")